@@ -1,18 +1,130 @@
 import streamlit as st
 from PyPDF2 import PdfReader
 from docx import Document
+import os
 import re
+import numpy as np
 import pandas as pd
 from collections import Counter
-from typing import Iterator, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+import sys
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Match, NamedTuple, Optional, Pattern, Protocol, Set, Tuple, Union
+from pdf_worker import extract_page_range
 
-def extract_text_pdf(file) -> str:
-    reader = PdfReader(file)
-    return "\n".join((page.extract_text() or "") for page in reader.pages)
+try:
+    import re2
+except ImportError:  # google-re2 is optional; patterns fall back to the stdlib engine
+    re2 = None
 
-def extract_text_docx(file) -> str:
-    doc = Document(file)
-    return "\n".join(p.text for p in doc.paragraphs if p.text)
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pypdfium2 is optional; PDFs are then read with PyPDF2
+    pdfium = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; keywords are then checked one by one
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:  # hyperscan is optional; scan_signals then falls back to regex passes
+    hyperscan = None
+
+# Python's \s on str also covers \v and \x1c-\x1f; RE2's does not.
+_RE2_ASCII_SPACE = r'[\t\n\v\f\r \x1c-\x1f]'
+
+class RegexMatch(Protocol):
+    # The part of re.Match that RE2's match objects also provide.
+    @property
+    def lastindex(self) -> Optional[int]: ...
+    def group(self, group: Union[int, str], /) -> Any: ...
+    def groups(self) -> Tuple[Any, ...]: ...
+    def start(self, group: Union[int, str] = 0, /) -> int: ...
+    def end(self, group: Union[int, str] = 0, /) -> int: ...
+
+class Regex(Protocol):
+    # What _compile returns: a re.Pattern or an _EnginePair.
+    def search(self, string: str, pos: int = 0, endpos: int = sys.maxsize, /) -> Optional[RegexMatch]: ...
+    def match(self, string: str, pos: int = 0, endpos: int = sys.maxsize, /) -> Optional[RegexMatch]: ...
+    def finditer(self, string: str, pos: int = 0, endpos: int = sys.maxsize, /) -> Iterator[RegexMatch]: ...
+    def findall(self, string: str, pos: int = 0, endpos: int = sys.maxsize, /) -> List[Any]: ...
+
+class _EnginePair:
+    # RE2's \b, \d and \s only know ASCII while re's follow Unicode, so RE2 is
+    # only handed ASCII text, where the two agree; anything else goes to re.
+    def __init__(self, fast: Regex, exact: "Pattern[str]"):
+        self.fast = fast
+        self.exact = exact
+
+    def _pick(self, text: str) -> Regex:
+        return self.fast if text.isascii() else self.exact
+
+    def search(self, string: str, pos: int = 0, endpos: int = sys.maxsize) -> Optional[RegexMatch]:
+        return self._pick(string).search(string, pos, endpos)
+
+    def match(self, string: str, pos: int = 0, endpos: int = sys.maxsize) -> Optional[RegexMatch]:
+        return self._pick(string).match(string, pos, endpos)
+
+    def finditer(self, string: str, pos: int = 0, endpos: int = sys.maxsize) -> Iterator[RegexMatch]:
+        return self._pick(string).finditer(string, pos, endpos)
+
+    def findall(self, string: str, pos: int = 0, endpos: int = sys.maxsize) -> List[Any]:
+        return self._pick(string).findall(string, pos, endpos)
+
+def _compile(pattern: str, flags: int = 0) -> Regex:
+    """Compile with re, paired with RE2 for ASCII text when available and it accepts the pattern."""
+    exact = re.compile(pattern, flags)
+    if re2 is not None:
+        options = re2.Options()
+        options.case_sensitive = not (flags & re.IGNORECASE)
+        options.dot_nl = bool(flags & re.DOTALL)
+        options.log_errors = False
+        try:
+            return _EnginePair(re2.compile(pattern.replace(r'\s', _RE2_ASCII_SPACE), options), exact)
+        except re2.error:
+            pass
+    return exact
+
+PARALLEL_MIN_PAGES = 8  # below this, process start-up costs more than it saves
+
+def _extract_pages_pypdf2(reader: PdfReader, data: bytes) -> List[str]:
+    # Takes the open reader so other features can share one xref parse; the raw
+    # bytes are only needed by worker processes, which open their own reader.
+    n_pages = len(reader.pages)
+    workers = min(os.cpu_count() or 1, n_pages // PARALLEL_MIN_PAGES)
+    if workers > 1:
+        # PyPDF2 holds the GIL while decoding, so split the pages across processes.
+        step = -(-n_pages // workers)
+        jobs = [(data, i, min(i + step, n_pages)) for i in range(0, n_pages, step)]
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                return [text for chunk in ex.map(extract_page_range, jobs) for text in chunk]
+        except (BrokenProcessPool, OSError):
+            pass
+    return [(page.extract_text() or "") for page in reader.pages]
+
+@st.cache_data(show_spinner=False)
+def extract_pages_pdf(data: bytes) -> List[str]:
+    if pdfium is not None:
+        try:
+            pdf = pdfium.PdfDocument(data)
+            try:
+                # PDFium ends lines with \r\n; the patterns below treat \n as the line break.
+                return [page.get_textpage().get_text_range().replace("\r\n", "\n") for page in pdf]
+            finally:
+                pdf.close()
+        except Exception:
+            pass
+    return _extract_pages_pypdf2(PdfReader(BytesIO(data)), data)
+
+@st.cache_data(show_spinner=False)
+def extract_pages_docx(data: bytes) -> List[str]:
+    doc = Document(BytesIO(data))
+    # DOCX has no fixed pagination, so the whole document is a single page.
+    return ["\n".join(p.text for p in doc.paragraphs if p.text)]
 
 USCS_DRAIN = {
   "GW":"Excellent","SW":"Excellent","GP":"Good","SP":"Good",
@@ -21,36 +133,102 @@ USCS_DRAIN = {
   "OL":"Unstable","OH":"Unstable","PT":"Unstable"
 }
 RANK = {"Excellent":4,"Good":3,"Moderate":2,"Poor":1,"Very Poor":0,"Unstable":-1}
+_USCS_SIMPLE_RE = _compile(r'\b(GW|SW|GP|SP|GM|SM|GC|SC|ML|CL|MH|CH|OL|OH|PT)\b', flags=re.IGNORECASE)
+DRAINAGE_KEYWORDS = {
+    "silty clay":"poor","mh":"poor","ml":"poor","high plasticity":"poor","low permeability":"poor",
+    "sand":"good","gravel":"good","well-draining":"good","high permeability":"good",
+}
+
+def _build_drainage_automaton() -> Optional["ahocorasick.Automaton"]:
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword, category in DRAINAGE_KEYWORDS.items():
+        automaton.add_word(keyword, category)
+    automaton.make_automaton()
+    return automaton
 
-def assess_drainage(text: str) -> str:
-    tU = text.upper()
-    found = set(re.findall(r'\b(GW|SW|GP|SP|GM|SM|GC|SC|ML|CL|MH|CH|OL|OH|PT)\b', tU))
+_DRAINAGE_AC = _build_drainage_automaton()
+
+def assess_drainage(pages_lower: List[str]) -> str:
+    found = {c.upper() for page in pages_lower for c in _USCS_SIMPLE_RE.findall(page)}
     if found:
         qualities = [USCS_DRAIN[c] for c in found]
         overall = min(qualities, key=lambda q: RANK[q])
         return f"Mix ({', '.join(sorted(found))}) → overall {overall}"
-    t = text.lower()
-    if any(x in t for x in ["silty clay", "mh", "ml", "high plasticity", "low permeability"]):
+    hits: Set[str] = set()
+    for page in pages_lower:
+        if _DRAINAGE_AC is not None:
+            for _, category in _DRAINAGE_AC.iter(page):
+                hits.add(category)
+                if category == "poor":
+                    break
+        else:
+            hits.update(category for keyword, category in DRAINAGE_KEYWORDS.items() if keyword in page)
+        if "poor" in hits:
+            break
+    if "poor" in hits:
         return "Not well-draining (keyword inference)"
-    if any(x in t for x in ["sand", "gravel", "well-draining", "high permeability"]):
+    if "good" in hits:
         return "Likely well-draining (keyword inference)"
     return "Unclear – needs review"
 
-def find_groundwater(text: str) -> str:
-    t = text.lower()
-    if re.search(r'groundwater (?:was )?not encountered', t):
+# Pages are scanned one at a time; this much of the previous page is carried
+# over so a phrase split across a page break still matches.
+PAGE_CARRY = 300
+
+# Every groundwater pattern starts with "groundwater" or "water table", so they
+# are tried as anchored match() calls at the starts str.find turns up instead
+# of each searching the whole text. Plain re: match() needs no window.
+_GW_NOT_RE = re.compile(r'groundwater (?:was )?not encountered')
+_GW_SHALLOW_RE = re.compile(
+    r'(?:groundwater|water table)[^.\n]{0,60}?(?:<|less than|~|at|approx)[^.\n]{0,10}?5\s*ft',
+    flags=re.IGNORECASE
+)
+_GW_DEPTH_RE = re.compile(
+    r'(?:groundwater|water table)[^.\n]{0,60}?(\d+(?:\.\d+)?)\s*ft',
+    flags=re.IGNORECASE
+)
+
+def _groundwater_starts(buf: str) -> Iterator[int]:
+    i = buf.find("water")
+    while i >= 0:
+        if i >= 6 and buf.startswith("ground", i - 6):
+            yield i - 6
+        if buf.startswith("water table", i):
+            yield i
+        i = buf.find("water", i + 5)
+
+@st.cache_data(show_spinner=False)
+def find_groundwater(pages_lower: List[str], signals: Optional["TextSignals"] = None) -> str:
+    # Same precedence as searching each pattern in turn: any "not encountered"
+    # wins, then any shallow mention, then the first stated depth.
+    if signals is not None and not signals.anchors & {"groundwater", "water table"}:
         return "No"
-    if re.search(r'(groundwater|water table)[^.\n]{0,60}?(<|less than|~|at|approx)[^.\n]{0,10}?5\s*ft', t, re.IGNORECASE):
+    shallow = False
+    depth: Optional[float] = None
+    tail: Optional[str] = None
+    for page in pages_lower:
+        # \s*ft can cross the page break, so a mention near the end of the
+        # previous page is tried again with this page appended. Such a mention
+        # has only whitespace after its number, so no later mention on that
+        # page can already have given the first depth.
+        buf = page if tail is None else tail + "\n" + page
+        for start in _groundwater_starts(buf):
+            if _GW_NOT_RE.match(buf, start):
+                return "No"
+            if shallow:
+                continue
+            if _GW_SHALLOW_RE.match(buf, start):
+                shallow = True
+            elif depth is None:
+                m = _GW_DEPTH_RE.match(buf, start)
+                if m:
+                    depth = float(m.group(1))
+        tail = buf[-PAGE_CARRY:]
+    if shallow:
         return "Yes"
-    m = re.search(r'(groundwater|water table)[^.\n]{0,60}?(\d+(?:\.\d+)?)\s*ft', t, re.IGNORECASE)
-    if m:
-        try:
-            return "Yes" if float(m.group(2)) < 5.0 else "No"
-        except:
-            pass
-    if re.search(r'(water table|groundwater)[^.\n]{0,60}?(exceeds|>\s*|greater than)\s*6(\.5)?\s*ft', t):
-        return "No"
-    return "No"
+    return "Yes" if depth is not None and depth < 5.0 else "No"
 
 USCS_NAMES = {
     "GW":"Well-graded gravel","GP":"Poorly graded gravel",
@@ -61,28 +239,99 @@ USCS_NAMES = {
     "MH":"High-plasticity silt","CH":"High-plasticity clay",
     "OL":"Organic silt/clay","OH":"Organic clay","PT":"Peat (organic)"
 }
-USCS_PATTERN = r'\b(?:SC-SM|GW|GP|GM|GC|SW|SP|SM|SC|ML|CL|MH|CH|OL|OH|PT)\b'
-
-def extract_uscs_frequencies(text: str, collapse_compounds: bool = True):
-    T = text.upper()
-    all_codes = re.findall(USCS_PATTERN, T)
-    expanded = []
-    for code in all_codes:
-        if "-" in code and collapse_compounds:
-            expanded.extend([p for p in code.split("-") if p in USCS_NAMES])
+USCS_PATTERN = r'\b(?:GW|GP|GM|GC|SW|SP|SM|SC|ML|CL|MH|CH|OL|OH|PT)\b'
+USCS_COMPOUND = "SC-SM"
+USCS_COMPOUND_PATTERN = rf'\b{USCS_COMPOUND}\b'
+# The parts of a compound are word-bounded by the hyphen, so _USCS_ATOM_RE
+# already counts the SC and SM inside every SC-SM.
+_USCS_ATOM_RE = _compile(USCS_PATTERN, flags=re.IGNORECASE)
+_USCS_COMPOUND_RE = _compile(USCS_COMPOUND_PATTERN, flags=re.IGNORECASE)
+USCS_SCAN_CODES = (USCS_COMPOUND,) + tuple(USCS_NAMES)
+
+# Literals the downstream regexes cannot match without; a report that never
+# mentions one of these lets the matching analysis skip its scan entirely.
+# The boring phrases allow any whitespace and can straddle a page break, so
+# they share the bare word as their anchor.
+SIGNAL_ANCHORS = ("groundwater", "water table", "refusal", "boring")
+_ANCHOR_RE = _compile("|".join(f"({a})" for a in SIGNAL_ANCHORS), flags=re.IGNORECASE)
+
+class TextSignals(NamedTuple):
+    uscs: Counter          # code hits; SC and SM inside each SC-SM are counted as well
+    anchors: FrozenSet[str]
+
+def _build_signal_db() -> Optional["hyperscan.Database"]:
+    if hyperscan is None:
+        return None
+    expressions = [rf'\b{code}\b'.encode() for code in USCS_SCAN_CODES]
+    expressions += [a.encode() for a in SIGNAL_ANCHORS]
+    flags = [hyperscan.HS_FLAG_CASELESS] * len(USCS_SCAN_CODES)
+    flags += [hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(SIGNAL_ANCHORS)
+    db = hyperscan.Database()
+    db.compile(
+        expressions=expressions,
+        ids=list(range(len(expressions))),
+        elements=len(expressions),
+        flags=flags,
+    )
+    return db
+
+_SIGNAL_DB = _build_signal_db()
+
+@st.cache_data(show_spinner=False)
+def scan_signals(pages_lower: List[str]) -> TextSignals:
+    """Collect USCS code counts and anchor keywords in one pass over the lowercased pages."""
+    counts: Counter[str] = Counter()
+    anchors: Set[str] = set()
+    n_codes = len(USCS_SCAN_CODES)
+    def on_match(hit_id: int, start: int, end: int, flags: int, context: Any) -> None:
+        if hit_id < n_codes:
+            counts[USCS_SCAN_CODES[hit_id]] += 1
         else:
-            expanded.append(code)
-    counts = Counter([c for c in expanded if c in USCS_NAMES])
+            anchors.add(SIGNAL_ANCHORS[hit_id - n_codes])
+    atoms: Counter[str] = Counter()
+    compounds = 0
+    for page in pages_lower:
+        # Hyperscan's \b is byte-level, so like RE2 it only sees ASCII pages.
+        if _SIGNAL_DB is not None and page.isascii():
+            _SIGNAL_DB.scan(page.encode("ascii"), match_event_handler=on_match)
+            continue
+        atoms.update(_USCS_ATOM_RE.findall(page))
+        compounds += len(_USCS_COMPOUND_RE.findall(page))
+        for m in _ANCHOR_RE.finditer(page):
+            if m.lastindex:
+                anchors.add(SIGNAL_ANCHORS[m.lastindex - 1])
+    for code, n in atoms.items():
+        counts[code.upper()] += n
+    if compounds:
+        counts[USCS_COMPOUND] += compounds
+    return TextSignals(counts, frozenset(anchors))
+
+@st.cache_data(show_spinner=False)
+def extract_uscs_frequencies(pages_lower: List[str], collapse_compounds: bool = True, signals: Optional[TextSignals] = None) -> pd.DataFrame:
+    if signals is None:
+        signals = scan_signals(pages_lower)
+    counts = signals.uscs
+    compounds = counts[USCS_COMPOUND]
+    if compounds:
+        counts = counts.copy()
+        del counts[USCS_COMPOUND]
+        if not collapse_compounds:
+            first, _, second = USCS_COMPOUND.partition("-")
+            counts.subtract({first: compounds, second: compounds})
+            counts = +counts
     total = sum(counts.values())
     if total == 0:
         return pd.DataFrame(columns=["USCS Code","Soil Name","Count","Percent"])
-    rows = [{
-        "USCS Code": code,
-        "Soil Name": USCS_NAMES.get(code,""),
-        "Count": cnt,
-        "Percent": round(100*cnt/total,2)
-    } for code, cnt in counts.most_common()]
-    return pd.DataFrame(rows)
+    items = counts.most_common()
+    codes = [code for code, _ in items]
+    cnts = np.fromiter((cnt for _, cnt in items), dtype=np.int64, count=len(items))
+    bps = (cnts * 20000 + total) // (2 * total)  # basis points, rounded half up
+    return pd.DataFrame({
+        "USCS Code": codes,
+        "Soil Name": [USCS_NAMES.get(code,"") for code in codes],
+        "Count": cnts,
+        "Percent": bps / 100,
+    })
 
 BUCKET = {
     "GW":"excellent","SW":"excellent",
@@ -92,128 +341,244 @@ BUCKET = {
     "MH":"very_poor","CH":"very_poor",
     "OL":"unstable","OH":"unstable","PT":"unstable",
 }
+BUCKET_ORDER = ("excellent","good","moderate","poor","very_poor","unstable")
+BUCKET_IDX = {code: BUCKET_ORDER.index(cat) for code, cat in BUCKET.items()}
 
-def drainage_from_uscs_percentages(uscs_df: pd.DataFrame, fallback_text: str) -> str:
-    if uscs_df.empty or "Percent" not in uscs_df.columns:
-        return assess_drainage(fallback_text)
-    totals = {k:0.0 for k in ["excellent","good","moderate","poor","very_poor","unstable"]}
-    for _, row in uscs_df.iterrows():
-        cat = BUCKET.get(str(row["USCS Code"]))
-        if cat:
-            totals[cat] += float(row["Percent"])
-    bad = totals["poor"] + totals["very_poor"] + totals["unstable"]
-    ok  = totals["excellent"] + totals["good"]
-    mid = totals["moderate"]
-    if bad >= 60:
+@st.cache_data(show_spinner=False)
+def drainage_from_uscs_percentages(uscs_df: pd.DataFrame, fallback_pages_lower: List[str]) -> str:
+    if uscs_df.empty or "Count" not in uscs_df.columns:
+        return assess_drainage(fallback_pages_lower)
+    idx = uscs_df["USCS Code"].astype(str).map(BUCKET_IDX).to_numpy(dtype=float)
+    known = ~np.isnan(idx)
+    bucket = idx[known].astype(np.intp)
+    cnts = np.zeros(len(BUCKET_ORDER), dtype=np.int64)
+    np.add.at(cnts, bucket, uscs_df["Count"].to_numpy(dtype=np.int64)[known])
+    totals = np.zeros(len(BUCKET_ORDER))
+    np.add.at(totals, bucket, uscs_df["Percent"].to_numpy(dtype=float)[known])
+    excellent, good, mid, poor, very_poor, unstable = totals
+    # The thresholds are checked on exact counts so per-code rounding cannot tip them.
+    total = int(uscs_df["Count"].sum())
+    bad = int(cnts[3:].sum()) * 100
+    ok  = int(cnts[:2].sum()) * 100
+    if bad >= 60 * total:
         overall = "Overall NOT well-draining"
-    elif bad >= 40:
+    elif bad >= 40 * total:
         overall = "Mostly not well-draining"
-    elif ok >= 50 and bad < 30:
+    elif ok >= 50 * total and bad < 30 * total:
         overall = "Overall well-draining tendency"
     else:
         overall = "Mixed drainage"
     return (
         f"{overall} — mix: "
-        f"excellent {totals['excellent']:.1f}%, good {totals['good']:.1f}%, "
-        f"moderate {mid:.1f}%, poor {totals['poor']:.1f}%, "
-        f"very poor {totals['very_poor']:.1f}%, unstable {totals['unstable']:.1f}%"
+        f"excellent {excellent:.1f}%, good {good:.1f}%, "
+        f"moderate {mid:.1f}%, poor {poor:.1f}%, "
+        f"very poor {very_poor:.1f}%, unstable {unstable:.1f}%"
     )
 
-def iter_boring_sections(text: str) -> Iterator[Tuple[str, str]]:
-    pat = re.compile(
-        r'LOG\s+OF\s+BORING\s+(GEO-\d{3})(.*?)(?=LOG\s+OF\s+BORING\s+GEO-\d{3}|Appendix|$)',
-        flags=re.IGNORECASE | re.DOTALL
-    )
-    for m in pat.finditer(text):
-        yield m.group(1).upper(), m.group(2)
+# (total, shallow, percent shallow, refusal depth per boring ID)
+RefusalSummary = Tuple[int, int, float, Dict[str, float]]
+
+# Plain re: the header is only ever tried with an anchored match() at each "log",
+# which needs no window, so the \s+ runs stay unbounded.
+_BORING_HDR_RE = re.compile(r'log\s+of\s+boring\s+(geo-\d{3})', flags=re.IGNORECASE)
+
+_NON_SPACE_RE = re.compile(r'\S')
+
+def _finditer_near(pattern: Regex, anchor: str, buf: str, pos: int = 0, back: int = 0) -> Iterator[Tuple[int, RegexMatch]]:
+    # Every match contains the lowercase literal `anchor` at most `back` chars
+    # after its start, so str.find skips the text between occurrences and the
+    # regex only runs on a window around each one. A match can only leave the
+    # anchor's line through a trailing \s* (e.g. "3\n\nft"), so the window ends
+    # with the line where the whitespace run after the anchor's line stops.
+    # Ending the window just past a newline keeps \b exact at the end, and one
+    # char of context before the start keeps it exact there. The window is
+    # sliced out so RE2 only re-encodes that much; yields (offset, match).
+    i = buf.find(anchor, pos)
+    while i >= 0:
+        eol = buf.find("\n", i)
+        if eol >= 0:
+            text = _NON_SPACE_RE.search(buf, eol)
+            eol = buf.find("\n", text.start()) if text else -1
+        lo = max(pos, i - back)
+        base = max(lo - 1, 0)
+        m = pattern.search(buf[base:len(buf) if eol < 0 else eol + 1], lo - base)
+        if m is None:
+            i = buf.find(anchor, i + 1)
+            continue
+        yield base, m
+        pos = base + m.end()
+        i = buf.find(anchor, pos)
+
+class _PageScanner:
+    # Feeds pages one at a time, carrying the unmatched tail of each into the next,
+    # so several patterns can share a single walk over the document.
+    def __init__(self, pattern: Regex, anchor: Optional[str] = None, back: int = 0):
+        self.pattern = pattern
+        self.anchor = anchor
+        self.back = back
+        self.tail: Optional[str] = None
+
+    def feed(self, page: str) -> Iterator[RegexMatch]:
+        buf = page if self.tail is None else self.tail + "\n" + page
+        last_end = 0
+        hits = ((0, m) for m in self.pattern.finditer(buf)) if self.anchor is None else _finditer_near(self.pattern, self.anchor, buf, 0, self.back)
+        for base, m in hits:
+            yield m
+            last_end = base + m.end()
+        self.tail = buf[max(last_end, len(buf) - PAGE_CARRY):]
 
-REFUSAL_NUM_PAT = re.compile(
-    r'\brefusal[^.\n]{0,160}?(\d+(?:\.\d+)?)\s*(?:feet|ft)\b',
+def _next_boring_header(buf: str, pos: int = 0) -> Optional[Match]:
+    i = buf.find("log", pos)
+    while i >= 0:
+        m = _BORING_HDR_RE.match(buf, i)
+        if m:
+            return m
+        i = buf.find("log", i + 1)
+    return None
+
+def iter_boring_sections(pages_lower: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    # A section runs from its header to the next header, an Appendix heading or
+    # the end of the document, so an open section is carried across pages whole.
+    # `resume` is how far the carried section was already searched for its end.
+    buf: Optional[str] = None
+    resume = 0
+    for page in pages_lower:
+        buf = page if buf is None else buf + "\n" + page
+        pos = 0
+        while True:
+            head = _next_boring_header(buf, pos)
+            if head is None:
+                buf = buf[max(pos, len(buf) - PAGE_CARRY):]
+                break
+            scan = max(head.end(), resume)
+            resume = 0
+            nxt = _next_boring_header(buf, scan)
+            ends = [e for e in (buf.find("appendix", scan), nxt.start() if nxt else -1) if e >= 0]
+            if not ends:
+                resume = max(scan, len(buf) - PAGE_CARRY) - head.start()
+                buf = buf[head.start():]
+                break
+            end = min(ends)
+            yield head.group(1).upper(), buf[head.end():end]
+            pos = end
+    if buf:
+        head = _next_boring_header(buf)
+        if head is not None:
+            yield head.group(1).upper(), buf[head.end():]
+
+# The gap is empty or ends on a non-digit, so the depth can only start at a
+# digit-run boundary instead of being retried at every offset of a long number.
+REFUSAL_NUM_PAT = _compile(
+    r'\brefusal(?:[^.\n]{0,159}?[^.\n\d])??(\d+(?:\.\d+)?)\s*(?:feet|ft)\b',
+    flags=re.IGNORECASE
+)
+
+_BORING_NARRATIVE_RE = _compile(
+    r'Soil\s+borings?\s+were\s+completed\s+at\s+(\d+)\s+locations',
+    flags=re.IGNORECASE
+)
+_BORING_SUP_RE = _compile(
+    r'A\s+total\s+of\s+(\d+)\s+soil\s+borings?\s+were?\s+completed',
     flags=re.IGNORECASE
 )
+_BORING_GLOBAL_RE = _compile(
+    r'(GEO-\d{3}).{0,120}?refusal(?:[^.\n]{0,119}?[^.\n\d])??(\d+(?:\.\d+)?)\s*(?:feet|ft)',
+    flags=re.IGNORECASE | re.DOTALL
+)
+
+def _record_depth(ids_with_depth: Dict[str, float], sid: str, depth: str, threshold_ft: float) -> int:
+    try:
+        d = float(depth)
+    except ValueError:
+        return 0
+    ids_with_depth[sid] = d
+    return int(d < threshold_ft)
 
-def _count_shallow_refusals_borings(text: str, threshold_ft: float = 8.0):
+def _count_shallow_refusals_borings(pages_lower: List[str], threshold_ft: float = 8.0, signals: Optional[TextSignals] = None) -> RefusalSummary:
     total = 0
     shallow = 0
-    ids_with_depth = {}
-    for sid, sec in iter_boring_sections(text):
+    ids_with_depth: Dict[str, float] = {}
+    if signals is not None and "boring" not in signals.anchors:
+        return 0, 0, 0.0, ids_with_depth
+    has_refusal = signals is None or "refusal" in signals.anchors
+    for sid, sec in iter_boring_sections(pages_lower):
         total += 1
-        m = REFUSAL_NUM_PAT.search(sec)
-        if m:
-            try:
-                depth = float(m.group(1))
-                ids_with_depth[sid] = depth
-                if depth < threshold_ft:
-                    shallow += 1
-            except ValueError:
-                pass
+        hit = next(_finditer_near(REFUSAL_NUM_PAT, "refusal", sec), None) if has_refusal else None
+        if hit:
+            shallow += _record_depth(ids_with_depth, sid, hit[1].group(1), threshold_ft)
     pct = round(100 * shallow / total, 1) if total else 0.0
     return total, shallow, pct, ids_with_depth
 
-def _boring_fallback_counts(text: str, threshold_ft: float = 8.0):
-    t = text
+def _boring_fallback_counts(pages_lower: List[str], threshold_ft: float = 8.0, signals: Optional[TextSignals] = None) -> RefusalSummary:
+    # The three fallback patterns share one walk over the pages.
+    has_narrative = signals is None or "boring" in signals.anchors
+    has_refusal = signals is None or "refusal" in signals.anchors
+    narrative = _PageScanner(_BORING_NARRATIVE_RE) if has_narrative else None
+    sup = _PageScanner(_BORING_SUP_RE) if has_narrative else None
+    refusals = _PageScanner(_BORING_GLOBAL_RE, anchor="refusal", back=127) if has_refusal else None
     total = 0
-    for m in re.finditer(r'Soil\s+borings?\s+were\s+completed\s+at\s+(\d+)\s+locations', t, re.IGNORECASE):
-        try:
-            total += int(m.group(1))
-        except ValueError:
-            pass
-    m_sup = re.search(r'A\s+total\s+of\s+(\d+)\s+soil\s+borings?\s+were?\s+completed', t, re.IGNORECASE)
-    if m_sup:
-        try:
-            total += int(m_sup.group(1))
-        except ValueError:
-            pass
     shallow = 0
-    ids_with_depth = {}
-    for sid, depth in re.findall(r'(GEO-\d{3}).{0,120}?refusal[^.\n]{0,120}?(\d+(?:\.\d+)?)\s*(?:feet|ft)', t, re.IGNORECASE | re.DOTALL):
-        try:
-            d = float(depth)
-            ids_with_depth[sid.upper()] = d
-            if d < threshold_ft:
-                shallow += 1
-        except ValueError:
-            pass
-    pct = round(100 * shallow / (total if total else 1), 1) if total else 0.0
+    ids_with_depth: Dict[str, float] = {}
+    for page in pages_lower:
+        if narrative is not None:
+            total += sum(int(m.group(1)) for m in narrative.feed(page))
+        if sup is not None:
+            m_sup = next(sup.feed(page), None)
+            if m_sup:
+                total += int(m_sup.group(1))
+                sup = None
+        if refusals is not None:
+            for m in refusals.feed(page):
+                sid, depth = m.groups()
+                shallow += _record_depth(ids_with_depth, sid.upper(), depth, threshold_ft)
+    pct = round(100 * shallow / total, 1) if total else 0.0
     return total, shallow, pct, ids_with_depth
 
-def count_boring_refusals_under_8ft(text: str, threshold_ft: float = 8.0):
-    total, shallow, pct, ids = _count_shallow_refusals_borings(text, threshold_ft)
-    if total == 0:
-        return _boring_fallback_counts(text, threshold_ft)
-    return total, shallow, pct, ids
-
-st.set_page_config(page_title="Geotechnical Report Analyzer", layout="centered")
-st.title("📑 Geotechnical Report Analyzer (Borings Only)")
-
-uploaded_file = st.file_uploader("Upload a PDF or DOCX", type=["pdf", "docx"])
-
-if uploaded_file:
-    st.success(f"Uploaded: {uploaded_file.name}")
-    with st.spinner("Reading and analyzing..."):
-        text = extract_text_pdf(uploaded_file) if uploaded_file.name.lower().endswith(".pdf") else extract_text_docx(uploaded_file)
-        uscs_df = extract_uscs_frequencies(text, collapse_compounds=True)
-        drainage = drainage_from_uscs_percentages(uscs_df, text)
-        gw = find_groundwater(text)
-        bor_total, bor_shallow, bor_pct, bor_depths = count_boring_refusals_under_8ft(text, threshold_ft=8.0)
-
-    st.header("📊 Analysis Results")
-    st.write(f"**Porous/Well-Draining Soils?** → `{drainage}`")
-    st.write(f"**Groundwater Shallower Than 5 ft?** → `{gw}`")
-
-    st.subheader("📏 Refusal Summary (< 8 ft) — Borings")
-    if bor_total == 0:
-        st.write("Boring log appendices are not retrievable with this tool.")
-    else:
-        st.write(f"`{bor_shallow} of {bor_total}` ({bor_pct}%)")
+@st.cache_data(show_spinner=False)
+def count_boring_refusals_under_8ft(pages_lower: List[str], threshold_ft: float = 8.0, signals: Optional[TextSignals] = None) -> RefusalSummary:
+    """Count boring logs with a shallow refusal; narrative boring counts are the fallback when no logs exist."""
+    summary = _count_shallow_refusals_borings(pages_lower, threshold_ft, signals)
+    if summary[0] == 0:
+        return _boring_fallback_counts(pages_lower, threshold_ft, signals)
+    return summary
 
-    if st.checkbox("Show parsed refusal depths (debug)"):
-        st.write({"borings": bor_depths})
+# Worker processes started with spawn re-run this file as __mp_main__; only
+# the Streamlit run itself should draw the page.
+if __name__ == "__main__":
+    st.set_page_config(page_title="Geotechnical Report Analyzer", layout="centered")
+    st.title("📑 Geotechnical Report Analyzer (Borings Only)")
 
-    st.subheader("🧱 Most Common USCS Soils in Report")
-    if uscs_df.empty:
-        st.write("No USCS codes detected in extracted text.")
-    else:
-        st.dataframe(uscs_df[["USCS Code","Soil Name","Percent"]], use_container_width=True)
+    uploaded_file = st.file_uploader("Upload a PDF or DOCX", type=["pdf", "docx"])
+
+    if uploaded_file:
+        st.success(f"Uploaded: {uploaded_file.name}")
+        with st.spinner("Reading and analyzing..."):
+            data = uploaded_file.getvalue()
+            extract_pages = extract_pages_pdf if uploaded_file.name.lower().endswith(".pdf") else extract_pages_docx
+            pages_lower = [page.lower() for page in extract_pages(data)]
+            signals = scan_signals(pages_lower)
+            uscs_df = extract_uscs_frequencies(pages_lower, collapse_compounds=True, signals=signals)
+            drainage = drainage_from_uscs_percentages(uscs_df, pages_lower)
+            gw = find_groundwater(pages_lower, signals)
+            bor_total, bor_shallow, bor_pct, bor_depths = count_boring_refusals_under_8ft(pages_lower, threshold_ft=8.0, signals=signals)
+
+        st.header("📊 Analysis Results")
+        st.write(f"**Porous/Well-Draining Soils?** → `{drainage}`")
+        st.write(f"**Groundwater Shallower Than 5 ft?** → `{gw}`")
+
+        st.subheader("📏 Refusal Summary (< 8 ft) — Borings")
+        if bor_total == 0:
+            st.write("Boring log appendices are not retrievable with this tool.")
+        else:
+            st.write(f"`{bor_shallow} of {bor_total}` ({bor_pct}%)")
+
+        if st.checkbox("Show parsed refusal depths (debug)"):
+            st.write({"borings": bor_depths})
+
+        st.subheader("🧱 Most Common USCS Soils in Report")
+        if uscs_df.empty:
+            st.write("No USCS codes detected in extracted text.")
+        else:
+            st.dataframe(uscs_df[["USCS Code","Soil Name","Percent"]], use_container_width=True)
 
-    st.info("Answers are inferred from extracted text. For high-stakes decisions, verify with boring logs/appendices.")
\ No newline at end of file
+        st.info("Answers are inferred from extracted text. For high-stakes decisions, verify with boring logs/appendices.")
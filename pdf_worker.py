@@ -0,0 +1,12 @@
+from io import BytesIO
+from typing import List, Tuple
+
+from PyPDF2 import PdfReader
+
+# Kept out of app.py so worker processes only import PyPDF2: under the spawn
+# start method (Windows, macOS) a pickled app.py function would make every
+# worker re-run the Streamlit script.
+def extract_page_range(job: Tuple[bytes, int, int]) -> List[str]:
+    data, start, stop = job
+    reader = PdfReader(BytesIO(data))
+    return [(reader.pages[i].extract_text() or "") for i in range(start, stop)]
@@ -0,0 +1,9 @@
+import app
+
+def test_refusal_depth_unit_after_blank_line():
+    pages = ["log of boring geo-001 auger refusal at 3\n\nft"]
+    assert app.count_boring_refusals_under_8ft(pages) == (1, 1, 100.0, {"GEO-001": 3.0})
+
+def test_fallback_depth_unit_after_blank_line():
+    pages = ["geo-001 auger refusal at 3\n\nft. soil borings were completed at 2 locations"]
+    assert app.count_boring_refusals_under_8ft(pages) == (2, 1, 50.0, {"GEO-001": 3.0})
@@ -0,0 +1,51 @@
+import pytest
+
+import app
+
+# Non-ASCII text that PDFs routinely produce: NBSP, thin spaces, accented
+# letters next to codes, and the ASCII whitespace RE2's \s leaves out.
+SAMPLES = [
+    "log of boring geo-001\nauger refusal at\xa03\xa0ft",
+    "log of\xa0boring geo-002\nrefusal at 4 ft",
+    "scé and gwé samples; sm",
+    "café sm-ml; sc sm, cl",
+    "groundwater\xa0at 4\xa0ft",
+    "refusal at\x0b3 ft and\x1c5 ft",
+    "soil borings were\x0bcompleted at 4 locations",
+]
+
+PATTERNS = [
+    "REFUSAL_NUM_PAT", "_BORING_NARRATIVE_RE", "_BORING_SUP_RE", "_BORING_GLOBAL_RE",
+    "_USCS_SIMPLE_RE", "_USCS_ATOM_RE", "_USCS_COMPOUND_RE", "_ANCHOR_RE",
+]
+
+def _spans(pattern, text):
+    return [(m.span(), m.groups()) for m in pattern.finditer(text)]
+
+@pytest.mark.parametrize("name", PATTERNS)
+def test_paired_pattern_matches_re(name):
+    pattern = getattr(app, name)
+    if not isinstance(pattern, app._EnginePair):
+        pytest.skip("RE2 not installed")
+    for text in SAMPLES:
+        assert _spans(pattern, text) == _spans(pattern.exact, text)
+        ascii_text = text.encode("ascii", "replace").decode("ascii")
+        assert _spans(pattern.fast, ascii_text) == _spans(pattern.exact, ascii_text)
+
+def test_refusal_counts_non_ascii():
+    pages = ["log of boring geo-001\nauger refusal at\xa03\xa0ft"]
+    assert app.count_boring_refusals_under_8ft(pages) == (1, 1, 100.0, {"GEO-001": 3.0})
+    pages = ["log of\xa0boring geo-001\nrefusal at 3 ft"]
+    assert app.count_boring_refusals_under_8ft(pages) == (1, 1, 100.0, {"GEO-001": 3.0})
+
+def test_signal_db_matches_regex_scan(monkeypatch):
+    if app._SIGNAL_DB is None:
+        pytest.skip("hyperscan not installed")
+    pages = SAMPLES + ["sc-sm, gw and sm. groundwater at 3 ft"]
+    with_db = app.scan_signals(pages)
+    app.scan_signals.clear()
+    monkeypatch.setattr(app, "_SIGNAL_DB", None)
+    assert app.scan_signals(pages) == with_db
+
+def test_signal_db_word_boundaries_non_ascii():
+    assert app.scan_signals(["scé and gwé samples; sm"]).uscs == {"SM": 1}
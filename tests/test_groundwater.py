@@ -0,0 +1,5 @@
+import app
+
+def test_depth_split_across_page_break():
+    assert app.find_groundwater(["groundwater at 3", "ft"]) == "Yes"
+    assert app.find_groundwater(["water table approx 5", "ft"]) == "Yes"